@@ -4,27 +4,45 @@
 Filename:  __init__.py
 Author:    Ing. Martin Zoula (zoulamar@fel.cvut.cz)
 
-The core library functionality to provide dataset processing pipelining. Note, that with a single run of the librarym, the PIPELINE_ROOT_PATH, USER_SOURCE_SPACE and VERBOSE module-level variables need to be set properly.
+The core library functionality to provide dataset processing pipelining. Note, that with a single run of the librarym, the PIPELINE_ROOT_PATH and USER_SOURCE_SPACE module-level variables need to be set properly. Verbose output is enabled by setting the "pypipe" logger to DEBUG level.
 (TODO? Load it from ENV?)
 """
 
-import sys
+import functools, hashlib, logging, os, stat, sys, threading, time, weakref
 from abc import ABC, abstractmethod
-import os, time
 from pathlib import Path
-from typing import Callable, Dict, Iterator, Literal, Tuple, Type, Union, Any, final
-from colored import fg, attr
-from pprint import pformat
-from abc import ABC, abstractmethod
-import importlib, os, sys
-from pathlib import Path
-from pprint import pformat
-from typing import Dict, List, Union, final, Type, Iterator, Tuple
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Literal, Mapping, Set, Tuple, Type, Union, final
+# NOTE: `colored`, `importlib` and `concurrent.futures` are imported where needed, sparing the import time of CLI calls which never reach them.
 
 USER_SOURCE_SPACE:Path|None = None
 """ Directory with user-provided computational modules. """
-VERBOSE:bool = False
-""" Enable verbose debug output to see what is pypipe doing. """
+LOGGER = logging.getLogger("pypipe")
+""" Progress reports of `make` (INFO) and a trace of what is pypipe doing (DEBUG). Silent unless the application configures logging, as the `pypipe` CLI does. """
+
+@functools.lru_cache(maxsize=None)
+def _repr_style() -> Tuple[str, str, Dict[Union[None,bool],str]]:
+    """ Terminal escapes for target `repr`: reset, dim and a color by (possibly unknown) up-to-dateness. Imports `colored` on first use only, and not at all when no terminal is attached. """
+    if not (sys.stdout.isatty() or sys.stderr.isatty()):
+        return "", "", {None: "", True: "", False: ""}
+    from colored import fg, attr
+    return attr("reset"), attr("dim"), {None: "", True: fg("green"), False: fg("red")}
+
+def _iter_py_files(root:str) -> Iterator[os.DirEntry]:
+    """ Recursively yields the Python sources under `root` as raw directory entries, without symlinked directories (like `os.walk`). """
+    stack = [root]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue # Unreadable directories are skipped, as `os.walk` does.
+        with it:
+            for entry in it:
+                if entry.is_dir():
+                    if not entry.is_symlink():
+                        stack.append(entry.path)
+                elif entry.name.endswith(".py"):
+                    yield entry
 
 class BaseModule(ABC):
     """ This class provides a convention of a meaningful organizing of the targets.
@@ -41,142 +59,313 @@ class BaseModule(ABC):
     By convention, there are two types of targets, the primary targets and other targets.
     The primary targets do not have colon (:) in their name.
     Other targets use the colon as long as they are related to the primary target.
+
+    The attributes defined here are slotted. Subclasses may declare their own `__slots__` to stay `__dict__`-free, otherwise they simply get a `__dict__` for their extra attributes.
     """
 
-    ACTIVE_MODULE_REGISTRY:Dict[Path,"BaseModule"] = {}
-    """ A lookup table (Path->BaseModule instance) to prevent loading of duplicate Modules. """
+    __slots__ = ("module_path", "parent_module", "_targets", "_targets_by_type", "_primary_names", "_pipeline", "_codename_pipeline")
+
+    ACTIVE_MODULE_REGISTRY:Dict[str,"BaseModule"] = {}
+    """ A lookup table (resolved path string->BaseModule instance) to prevent loading of duplicate Modules. Resolved, so that relative and absolute spellings of one directory share an instance. Strong, as a module's targets stay registered as long as anyone holds them; a re-created module would collide with them. """
+
+    is_root_module:bool = False
+    """ Set to True in subclasses which start a pipeline, i.e., have no parent module. """
+
+    SOURCE_FILE_NAMES:Tuple[str,...] = ("source.py", "src.py")
+    """ Generic names of a module's source file probed in its directory (after `<module name>.py`). """
+
+    CLASS_CANDIDATE_NAMES:Tuple[str,...] = ("Module", "Main")
+    """ Generic names of the `BaseModule` subclass looked up in a module's source (after `<module name>`). """
+
+    _CLASS_CACHE:Dict[str,Type["BaseModule"]] = {}
+    """ A lookup table (Python module spec->BaseModule subclass) so that many stages of the same type import and inspect their source only once. """
+
+    _IMPORT_ERRORS:Dict[str,BaseException] = {}
+    """ A lookup table (Python module spec->raised exception) of failed imports so that they are not retried. """
+
+    _SYS_PATH_SEEN:Set[str] = set(sys.path)
+    """ Mirrors `sys.path` entries (as seeded at import time and added by the loader) for constant-time membership checks. """
+
+    _SOURCE_INDEX:Dict[str,Dict[str,List[str]]] = {}
+    """ A lookup table (source space->Python module name->source files) built by a single walk of each source space. """
+
+    _SOURCE_INDEX_LOCK = threading.Lock()
+    """ Serializes building `_SOURCE_INDEX`, so that threads of `preload_paths` do not each walk the source space. """
+
+    _SOURCE_CACHE:Dict[str,Path|None] = {}
+    """ A lookup table (resolved path->Python source or None) of module source locations already probed. Both keys and sources are absolute, so a change of the working directory leaves no entry stale. """
+
+    _RESOLVED:Dict[str,str] = {}
+    """ A lookup table (absolute path string->resolved path string) sparing repeated `realpath` syscalls. Keyed by absolute paths, so that relative paths follow `os.chdir`. """
 
     @final
     @staticmethod
     def module_lazy_loader(path:Path) -> "BaseModule":
         """ Match a Python module with given sub-directory of a selected pipeline root. Get a module at given path efficiently without duplicate instances. """
 
+        # Perform caching. For a given path, the module is unique. Checked first, as this is the common case.
+        key = BaseModule._resolved(path)
+        cached = BaseModule.ACTIVE_MODULE_REGISTRY.get(key)
+        if cached is not None:
+            LOGGER.debug("%s's module_lazy_loader: Using cached module.", path.name)
+            return cached
+
         # Misc. start.
-        assert path.is_dir(), f"The pypipe system requires modules to be directories. Given path {path} is not."
-        pymodule_name:str = path.stem # NOTE: This separates the stage's label from stage module.
         sep = f"{path.name}'s "
-        if VERBOSE:
-            print(f"{sep}module_lazy_loader: Module path: {path}")
-            print(f"{sep}module_lazy_loader: Module name: {pymodule_name}")
+        LOGGER.debug("%smodule_lazy_loader: Module path: %s", sep, path)
+        LOGGER.debug("%smodule_lazy_loader: Module name: %s", sep, path.stem) # NOTE: The stem separates the stage's label from stage module.
 
-        # Perform caching. For a given path, the module is unique.
-        if path in BaseModule.ACTIVE_MODULE_REGISTRY:
-            if VERBOSE: print(f"{sep}module_lazy_loader: Using cached module.")
-            return BaseModule.ACTIVE_MODULE_REGISTRY[path]
+        # Load it, finally. The parent is loaded by the constructor, and only if the instance is not a root; it may decide so at runtime via the `is_root_module` argument.
+        instance = BaseModule._resolve_module_class(path)(path)
+        LOGGER.debug("%smodule_lazy_loader: Fresh instance %s", sep, instance)
+        BaseModule.ACTIVE_MODULE_REGISTRY[key] = instance
+        return instance
+
+    @staticmethod
+    def _resolve_module_class(path:Path) -> Type["BaseModule"]:
+        """ Find the `BaseModule` subclass implementing the module at given path. """
+        pymodule_name:str = path.stem
+        sep = f"{path.name}'s "
 
         # Here the lookup for sources will happen.
-        pysrc:Path|None = None
+        pysrc:Path|None = BaseModule._locate_source(path)
         cls:type|None = None
-        for ending in (pymodule_name + '.py', 'source.py', 'src.py'):
-            if VERBOSE: print(f"{sep}module_lazy_loader: Probe {path/ending}")
-            if (path / ending).is_file():
-                pysrc = path / ending
-                if VERBOSE: print(f"{sep}module_lazy_loader: Found a source file in module's directory {pysrc}")
-                break
-        else:
-            # If no ad-hoc modules in the directory itself, try project's source space.
-            if USER_SOURCE_SPACE is not None:
-                results = sorted(USER_SOURCE_SPACE.glob(f"**/{pymodule_name}.py"))
-                if VERBOSE: print(f"{sep}module_lazy_loader: Probe source space {USER_SOURCE_SPACE} -> {pformat(results)}")
-                if len(results) > 0:
-                    selected_result = results[0]
-                    if VERBOSE: print(f"{sep}module_lazy_loader: Found a source file in source space {selected_result}")
-                    pysrc = selected_result.resolve()
-
-            # If still nothing found, fallback to std. modulees.
-            if pysrc is None:
-                if VERBOSE: print(f"{sep}module_lazy_loader: Probe std_modules.")
-                try:
-                    import pypipe.modules
-                    cls = pypipe.modules.__dict__[pymodule_name]
-                    assert cls is not None
-                    pysrc = Path("<std_modules>")
-                    if VERBOSE: print(f"{sep}module_lazy_loader: Candidate: {cls}")
-                    assert issubclass(cls, BaseModule)
-                    if VERBOSE: print(f"{sep}module_lazy_loader: Found std module {cls}")
-                except Exception as e:
-                    e.add_note("")
-                    raise
+
+        # If nothing found, fallback to std. modulees.
+        if pysrc is None:
+            LOGGER.debug("%s_resolve_module_class: Probe std_modules.", sep)
+            try:
+                import pypipe.modules
+                cls = BaseModule._check_module_class(pypipe.modules.__dict__[pymodule_name], "std_modules")
+                pysrc = Path("<std_modules>")
+                LOGGER.debug("%s_resolve_module_class: Found std module %s", sep, cls)
+            except Exception as e:
+                e.add_note("")
+                raise
 
         if pysrc is None and cls is None:
             raise ModuleNotFoundError(f"module_lazy_loader: Module for path {path} could not be resolved.")
         elif cls is None and pysrc is not None:
-            if VERBOSE: print(f"{sep}module_lazy_loader: Resulting python module to be loaded {pysrc}")
+            LOGGER.debug("%s_resolve_module_class: Resulting python module to be loaded %s", sep, pysrc)
+
+            # Module directories are usually given relative to the working directory already, sources from the source space are absolute.
+            cwd = os.getcwd()
+            pysrc_rel = os.fspath(pysrc)
+            if pysrc_rel.startswith(cwd + os.sep):
+                pysrc_rel = pysrc_rel[len(cwd) + 1:]
+            elif os.path.isabs(pysrc_rel):
+                raise ValueError(f"Module source {pysrc} is not within the working directory {cwd}.")
+            pysrc = Path(pysrc_rel)
+            LOGGER.debug("%s_resolve_module_class: Relative path %s", sep, pysrc)
+
+            pymodspec = ".".join((*pysrc.parent.parts, pysrc.stem)) # Separator agnostic, also for "/" spelled paths on Windows.
+            LOGGER.debug("%s_resolve_module_class: Pymodspec %s", sep, pymodspec)
+
+            import_error = BaseModule._IMPORT_ERRORS.get(pymodspec)
+            if import_error is not None:
+                LOGGER.debug("%s_resolve_module_class: Import of %s already failed before.", sep, pymodspec)
+                raise import_error
+
+            cls = BaseModule._CLASS_CACHE.get(pymodspec)
+            if cls is not None:
+                LOGGER.debug("%s_resolve_module_class: Using cached module type %s", sep, cls)
+            else:
+                pymod = sys.modules.get(pymodspec) # Already imported, e.g., by the user's code; no need for the import machinery.
+                if pymod is None:
+                    pysrc = pysrc.parent
+                    while True:
+                        path_to_add = BaseModule._resolved(pysrc)
+                        if not path_to_add in BaseModule._SYS_PATH_SEEN:
+                            LOGGER.debug("%s_resolve_module_class: Adding %s to PATH.", sep, path_to_add)
+                            sys.path.append(path_to_add)
+                            BaseModule._SYS_PATH_SEEN.add(path_to_add)
+                        else:
+                            LOGGER.debug("%s_resolve_module_class: %s already in PATH.", sep, path_to_add)
+                        if path_to_add == cwd or pysrc == pysrc.parent:
+                            break # Also at the filesystem root, should the working directory not be an ancestor.
+                        pysrc = pysrc.parent
+
+                    try:
+                        import importlib
+                        pymod = importlib.import_module(pymodspec)
+                    except ImportError as e:
+                        BaseModule._IMPORT_ERRORS[pymodspec] = e
+                        if isinstance(e, ModuleNotFoundError):
+                            LOGGER.error("%s_resolve_module_class: The module could not be imported. Either the passed directory is not a Module or the Module source is not in Python path.", sep)
+                        raise
+                LOGGER.debug("%s_resolve_module_class: Imported module %s", sep, pymod)
+
+                candidate_names = (pymodule_name,) + BaseModule.CLASS_CANDIDATE_NAMES
+                for candidate_name in candidate_names:
+                    if hasattr(pymod, candidate_name):
+                        cls = getattr(pymod, candidate_name)
+                        if isinstance(cls, type) and issubclass(cls, BaseModule):
+                            LOGGER.debug("%s_resolve_module_class: Module type %s", sep, cls)
+                            break
+                else:
+                    raise AttributeError(f"None of candidate_names {candidate_names} was found in the module {pymodule_name}")
+                BaseModule._CLASS_CACHE[pymodspec] = BaseModule._check_module_class(cls, pymodspec)
+            LOGGER.debug("%s_resolve_module_class: Final class in the module: %s", sep, cls)
+        else:
+            assert cls is not None
+        return cls
 
-            pysrc = pysrc.relative_to(Path(os.getcwd()))
-            if VERBOSE: print(f"{sep}module_lazy_loader: Relative path {pysrc}")
+    @staticmethod
+    def _check_module_class(cls:Any, origin:str) -> Type["BaseModule"]:
+        """ Ensures that a freshly resolved `cls` is an instantiable module type. Resolved types are cached, so this runs once per type rather than per instance. """
+        if not (isinstance(cls, type) and issubclass(cls, BaseModule)):
+            raise TypeError(f"{cls} found in {origin} is not a BaseModule subclass.")
+        if getattr(cls, "__abstractmethods__", None): # What `inspect.isabstract` checks, without importing `inspect`.
+            raise TypeError(f"{cls} found in {origin} is abstract, it does not implement {', '.join(sorted(cls.__abstractmethods__))}.")
+        return cls
 
-            pymodspec = str(pysrc.parent / pysrc.stem).replace("/", ".")
-            if VERBOSE: print(f"{sep}module_lazy_loader: Pymodspec {pymodspec}")
+    @staticmethod
+    def _locate_source(path:Path) -> Path|None:
+        """ Find the Python source of the module at given path, either in the module's directory or in the source space. Memoized per path. Only touches the filesystem, hence safe to run in threads. """
+        key = BaseModule._resolved(path)
+        if key in BaseModule._SOURCE_CACHE:
+            return BaseModule._SOURCE_CACHE[key]
 
-            pysrc = pysrc.parent
-            while True:
-                path_to_add = str(pysrc.resolve())
-                if not path_to_add in sys.path:
-                    if VERBOSE: print(f"{sep}module_lazy_loader: Adding {path_to_add} to PATH.")
-                    sys.path.append(path_to_add)
-                elif VERBOSE: print(f"{sep}module_lazy_loader: {path_to_add} already in PATH.")
-                if pysrc.resolve() == Path.cwd():
-                    break
-                pysrc = pysrc.parent
+        pymodule_name:str = path.stem
+        sep = f"{path.name}'s "
 
-            try:
-                pymod = importlib.import_module(pymodspec)
-            except ModuleNotFoundError:
-                print("The module could not be imported. Either the passed directory is not a Module or the Module source is not in Python path.")
-                raise
-            if VERBOSE: print(f"{sep}module_lazy_loader: Imported module {pymod}")
-
-            candidate_names = (pymodule_name, "Module", "Main")
-            for candidate_name in candidate_names:
-                if hasattr(pymod, candidate_name):
-                    cls = getattr(pymod, candidate_name)
-                    if callable(cls) and issubclass(cls, BaseModule):
-                        if VERBOSE: print(f"{sep}module_lazy_loader: Module type {cls}")
-                        break
-            else:
-                raise AttributeError(f"None of candidate_names {candidate_names} was found in the module {pymodule_name}")
-            if VERBOSE: print(f"{sep}module_lazy_loader: Final class in the module: {cls}")
+        # A single directory listing serves all the probes.
+        try:
+            with os.scandir(path) as it:
+                entries = {e.name: e for e in it}
+        except (FileNotFoundError, NotADirectoryError) as e:
+            raise NotADirectoryError(f"The pypipe system requires modules to be directories. Given path {path} is not.") from e
+        pysrc:Path|None = None
+        for ending in (pymodule_name + '.py',) + BaseModule.SOURCE_FILE_NAMES:
+            LOGGER.debug("%s_locate_source: Probe %s/%s", sep, path, ending)
+            if ending in entries and entries[ending].is_file():
+                pysrc = Path(os.path.abspath(path)) / ending
+                LOGGER.debug("%s_locate_source: Found a source file in module's directory %s", sep, pysrc)
+                break
         else:
-            assert cls is not None
+            # If no ad-hoc modules in the directory itself, try project's source space.
+            if USER_SOURCE_SPACE is not None:
+                pysrc = BaseModule._find_in_source_space(str(USER_SOURCE_SPACE), pymodule_name)
+                if pysrc is not None:
+                    LOGGER.debug("%s_locate_source: Found a source file in source space %s", sep, pysrc)
 
-        # Load it, finally.
-        instance = cls(path)
-        if VERBOSE: print(f"{sep}module_lazy_loader: Fresh instance {instance}")
-        BaseModule.ACTIVE_MODULE_REGISTRY[path] = instance
-        return instance
+        BaseModule._SOURCE_CACHE[key] = pysrc
+        return pysrc
+
+    @staticmethod
+    def preload_paths(paths:Iterable[Path]) -> List["BaseModule"]:
+        """ Load modules at several (e.g., sibling) paths at once.
+
+        The filesystem probing of all the paths overlaps in a thread pool; the imports and instantiations then run serially in the given order.
+        """
+        from concurrent.futures import ThreadPoolExecutor, wait
+        paths = list(paths)
+        with ThreadPoolExecutor() as pool:
+            futures = [pool.submit(BaseModule._locate_source, p) for p in paths if BaseModule._resolved(p) not in BaseModule.ACTIVE_MODULE_REGISTRY]
+            wait(futures) # Any errors are raised again by the serial loading below.
+        return [BaseModule.module_lazy_loader(p) for p in paths]
 
-    def __init__(self, module_path:Path, is_root_module:bool = False) -> None:
+    @staticmethod
+    def _resolved(path:Path) -> str:
+        """ Memoized and interned `str(path.resolve())`, as it keys the registry and `sys.path`. """
+        absolute = os.path.abspath(path)
+        resolved = BaseModule._RESOLVED.get(absolute)
+        if resolved is None:
+            resolved = BaseModule._RESOLVED[absolute] = sys.intern(os.path.realpath(absolute))
+        return resolved
+
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def _find_in_source_space(source_space:str, pymodule_name:str) -> Path|None:
+        """ Find the source file of given Python module name in the source space. The source space is indexed once and the result is memoized as it does not change within a single run. """
+        index = BaseModule._SOURCE_INDEX.get(source_space)
+        if index is None:
+            with BaseModule._SOURCE_INDEX_LOCK:
+                index = BaseModule._SOURCE_INDEX.get(source_space) # Another thread might have walked it meanwhile.
+                if index is None:
+                    index = {}
+                    for entry in _iter_py_files(source_space):
+                        index.setdefault(entry.name[:-3], []).append(entry.path)
+                    BaseModule._SOURCE_INDEX[source_space] = index
+        results = index.get(pymodule_name)
+        LOGGER.debug("_find_in_source_space: Probe source space %s -> %r", source_space, results)
+        if results:
+            return min(map(Path, results)).resolve() # Paths only for the few candidates, not the whole tree.
+        return None
+
+    @staticmethod
+    def reset_source_space_index() -> None:
+        """ Forgets the indexed source spaces and all source lookups. Call this when module sources were added or moved while running. """
+        BaseModule._SOURCE_INDEX.clear()
+        BaseModule._SOURCE_CACHE.clear()
+        BaseModule._find_in_source_space.cache_clear()
+
+    def __init__(self, module_path:Path, is_root_module:bool|None = None) -> None:
         """ The task now: Prepare the module for a computation. Instantiate Parent Module. Register all output files, either currently available or to-be-computed-yet. Perform sanity checks. """
         super().__init__()
 
         # Is the module valid, at least basically? Aint it duplicate?
+        assert BaseModule._resolved(module_path) not in BaseModule.ACTIVE_MODULE_REGISTRY, "Trying to instantiate a duplicate Module. Use BaseModule.module_lazy_loader(path_to_module) instead of creating a new one."
+        stem = module_path.name.partition(".")[0]
+        assert stem == type(self).__name__ or type(self).__name__ in BaseModule.CLASS_CANDIDATE_NAMES, f"Module directory {module_path.name} does not match the module type {type(self).__name__}."
         assert module_path.is_dir()
-        assert module_path.name.split(".")[0] if "." in module_path.name else module_path.name == self.__class__.__name__
-        assert module_path not in BaseModule.ACTIVE_MODULE_REGISTRY, "Trying to instantiate a duplicate Module. Use BaseModule.ACTIVE_MODULE_REGISTRY[path_to_module] instead of creating a new one."
         self.module_path = module_path
         """ A directory containing this module's targets. """
 
+        if is_root_module is None:
+            is_root_module = self.is_root_module
         self.parent_module:BaseModule|None = None if is_root_module else BaseModule.module_lazy_loader(self.module_path.parent)
         """ Previous computational stage. None iff this is the root node.  """
 
-        self.targets:Dict[str,GenericDataType] = self.declare_targets()
-        """ All declared targets. Anyone can reference to them, use them as dependencies or make them by calling their make method. """
+        self._pipeline:Tuple[BaseModule,...] = (self,) if self.parent_module is None else self.parent_module._pipeline + (self,)
+        """ All modules from the root one up to this one. """
 
-        # Inject dependency on source code of the module itself. NOTE: Not sure if necessary. TODO: Or configure it by local pypipe.yaml
-        source_code_target = GenericDataType(where=self.module_path, maker=GenericDataType.expect_made)
-        for _, v in self.targets.items():
-            v.depends["__module_source_code__"] = source_code_target
+        self._codename_pipeline:str|None = None
+        """ Memoized result of `codename_pipeline`. """
+
+        self._targets:Mapping[str,GenericDataType]|None = None
+        """ Backing storage of `targets`, declared on first access. """
+
+        self._targets_by_type:Dict[Type,List[Tuple[str,GenericDataType]]] = {}
+        """ Memoized results of `targets_by_type`. Valid forever, since the targets are frozen once declared. """
+
+        self._primary_names:Tuple[str,...]|None = None
+        """ Memoized result of `targets_primary_names`. """
+
+    @property
+    def targets(self) -> Mapping[str,"GenericDataType"]:
+        """ All declared targets. Anyone can reference to them, use them as dependencies or make them by calling their make method.
+
+        The targets are declared lazily on first access, so that merely walking the pipeline (e.g., enumerating it or looking up ancestors) does not pay for `declare_targets`.
+        The returned mapping is read-only; the set of targets does not change once declared.
+        """
+        if self._targets is None:
+            declared = self.declare_targets()
 
-        self.make_gitignore()
+            # Inject dependency on source code of the module itself. NOTE: Not sure if necessary. TODO: Or configure it by local pypipe.yaml
+            source_code_target = GenericDataType(where=self.module_path, maker=GenericDataType.expect_made)
+            for _, v in declared.items():
+                v.depends["__module_source_code__"] = source_code_target
+
+            self._targets = MappingProxyType(declared)
+
+            self.make_gitignore()
+        return self._targets
 
     def make_gitignore(self) -> None:
         """ Updates a .gitignore file with all targets. """
-        with open(self.module_path / ".gitignore", "w") as f:
-            for t in self.targets.values():
-                f.write(str(t.path.relative_to(self.module_path)) + "\n")
-            for t in self.extra_gitignore():
-                f.write(t + "\n")
+        lines = [str(t.path.relative_to(self.module_path)) for t in self.targets.values()]
+        lines.extend(self.extra_gitignore())
+        if GenericDataType.CONTENT_HASHES:
+            lines.append("*" + GenericDataType.HASH_SUFFIX)
+        content = "".join(l + "\n" for l in lines)
+        gitignore = self.module_path / ".gitignore"
+        try:
+            if gitignore.read_text() == content:
+                return # Unchanged; spare the write and the mtime bump.
+        except FileNotFoundError:
+            pass
+        gitignore.write_text(content)
 
     def extra_gitignore(self) -> List[str]:
         """ Override this to declare extra patterns to be ignored by Git. """
@@ -199,46 +388,42 @@ class BaseModule(ABC):
         return self.parent_module
 
     def get_root_module(self) -> "BaseModule":
-        inspected = self
-        while inspected.parent_module is not None:
-            inspected = inspected.parent_module
-        return inspected
+        return self._pipeline[0]
 
     def find_ancestor_module(self, what:str) -> Union["BaseModule",None]:
-        """ Returns parent module of given name or label. """
-        if self.module_path.name == what or self.module_path.suffix == what:
-            return self
-        if self.parent_module is None:
-            return None
-        return self.parent_module.find_ancestor_module(what)
+        """ Returns parent module of given name or label. The nearest one wins. """
+        for inspected in reversed(self._pipeline):
+            if inspected.module_path.name == what or inspected.module_path.suffix == what:
+                return inspected
+        return None
 
     @final
-    def enumerate_pipeline(self) -> List["BaseModule"]:
-        mod_list:List[BaseModule] = [self]
-        while mod_list[-1].parent_module is not None:
-            mod_list.append(mod_list[-1].parent_module)
-        return reversed(mod_list) # type: ignore
+    def enumerate_pipeline(self) -> Tuple["BaseModule",...]:
+        """ Returns all modules from the root one up to this one. """
+        return self._pipeline
 
     @final
-    def codename_pipeline(self):
-        return "-".join(map(lambda x : x.codename(), self.enumerate_pipeline()))
+    def codename_pipeline(self) -> str:
+        """ Codenames of the whole pipeline up to this module joined by dashes. Computed on first call, since the pipeline does not change. """
+        if self._codename_pipeline is None:
+            prefix = "" if self.parent_module is None else self.parent_module.codename_pipeline() + "-"
+            self._codename_pipeline = prefix + self.codename()
+        return self._codename_pipeline
 
     def codename(self):
         return self.module_path.name
 
     @final
     def targets_by_type(self, t:Type)->Iterator[Tuple[str, "GenericDataType"]]:
-        for n, v in self.targets.items():
-            if isinstance(v, t):
-                yield n,v
+        matches = self._targets_by_type.get(t)
+        if matches is None:
+            matches = self._targets_by_type[t] = [(n, v) for n, v in self.targets.items() if isinstance(v, t)]
+        yield from matches
 
     def targets_primary_names(self)->Iterator[str]:
-        primary_names = set()
-        for name in self.targets.keys():
-            name_striped:str = name.split(":")[0]
-            if name_striped not in primary_names:
-                primary_names.add(name_striped)
-                yield name_striped
+        if self._primary_names is None:
+            self._primary_names = tuple(dict.fromkeys(name.split(":", 1)[0] for name in self.targets))
+        yield from self._primary_names
 
 class GenericDataType(ABC):
     """ An abstraction of a file at specific path with associated dependencies and a maker function.
@@ -252,21 +437,56 @@ class GenericDataType(ABC):
 
     No-features:
         - Production mode management. (When you deploy a neural network, some targets like a learned parameters are not desired for recomputation. Use some root module's property as a flag for this purpose.)
+
+    Targets are slotted, as a pipeline may hold thousands of them. A subclass without its own `__slots__` just gets a `__dict__` back.
     """
 
-    USED_PATH_REGISTRY:Dict[Path,"GenericDataType"] = {}
-    """ This is to ensure that one file does not accidentaly have two different coexisting Target objects or two instances of the same target loaded in memory. """
+    __slots__ = ("path", "depends", "params", "parallelizable", "touched", "depth", "maker", "value",
+                 "_resolved_path", "_utd_cache", "_mtime_cache", "_digest_cache", "_cache_generation", "_repr_body", "__weakref__")
+
+    USED_PATH_REGISTRY:weakref.WeakValueDictionary[str,"GenericDataType"] = weakref.WeakValueDictionary()
+    """ This is to ensure that one file does not accidentaly have two different coexisting Target objects or two instances of the same target loaded in memory. Weak, so that targets of dropped modules (and their loaded values) can be garbage collected. """
 
     AUTO_SAVING_TO_FILE = True
     """ Set this to False to globally disable saving the results to file whenever `set` is called. Useful when deploying the pipeline on robot. """
 
+    MAKE_JOBS:Union[None,int] = 1
+    """ How many independent prequisities may be made at once by threads. 1 keeps `make` serial, `None` sizes the pool by the targets' `parallelizable`. """
+
+    MTIME_STAT_JOBS:int = 1
+    """ Threads stat-ing the contents of directory targets in batches of `MTIME_STAT_BATCH`. Pays off for huge directories on network filesystems; 1 stats serially. """
+
+    MTIME_STAT_BATCH:int = 128
+    """ Entries of a directory listing stat-ed per thread task, so that small directories are not split across threads. """
+
+    CONTENT_HASHES:bool = False
+    """ If True, a target whose prequisities are newer but byte-identical to those it was last made from counts as up-to-date. The prequisities' digests are recorded in a `HASH_SUFFIX` sidecar of the target whenever its maker has run. """
+
+    HASH_SUFFIX:str = ".pypipe-hash"
+    """ Appended to the path of a target to name its sidecar of prequisity digests. Listed in the generated `.gitignore` when `CONTENT_HASHES` is on. """
+
+    _GENERATION:int = 0
+    """ Bumped whenever any target may have changed. Memoized `is_up_to_date` and `mtime` values from older generations are discarded. """
+
+    _DEPENDENTS:Union[None,Dict["GenericDataType",List["GenericDataType"]]] = None
+    """ Reverse dependency edges of the DAG being made by the running `make`, `None` outside of it. Allows invalidating only the affected targets. """
+
+    _QUERYING:bool = False
+    """ Whether an `is_up_to_date` or `mtime` call from outside of `make` is being evaluated. Such a call starts a fresh generation, as the files may have changed since; its nested calls share the memoized values. """
+
     @staticmethod
     def filteritems(d:dict,t:Type)->Iterator[Tuple[str,"GenericDataType"]]:
         """ Generates tuple `name, value` only if `value` has same type as self. """
         for n, v in d.items():
-            if isinstance(v, t):
+            if GenericDataType._is_subtype(type(v), t):
                 yield n,v
 
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def _is_subtype(cls:Type, t:Type) -> bool:
+        """ Memoized `issubclass`; the targets are ABCs, whose subclass checks go through `ABCMeta` on every call. """
+        return issubclass(cls, t)
+
     @staticmethod
     def nop(*_, **__) -> Literal[True]:
         """ A placeholder callable `maker` used when the target is not made via this system. """
@@ -277,20 +497,23 @@ class GenericDataType(ABC):
         """ A placeholder callable `maker` used when the target is not made via this system. """
         return True
 
-    def __init__(self, where:Path, maker:Callable, depends:Dict[str,"GenericDataType"] = {}, params:Any=None, parallelizable:str="100%") -> None:
+    def __init__(self, where:Path, maker:Callable, depends:Union[None,Dict[str,"GenericDataType"]] = None, params:Any=None, parallelizable:str="100%") -> None:
         """ The `GenericDataType` has to be instantiated with some particular filesystem path which may be used for persistent storage of this target's value.
 
         However, the target can be also passed some runtime data via `self.set(...)`, bypassing those stored on `where`.
         This might be useful when the Pipeline is already trained and used only for computing the predictions.
         """
 
-        assert where.resolve() not in GenericDataType.USED_PATH_REGISTRY, f"Target at path {where} already open:\n{pformat(GenericDataType.USED_PATH_REGISTRY)}"
-        GenericDataType.USED_PATH_REGISTRY[where.resolve()] = self
+        self._resolved_path:str = sys.intern(os.path.realpath(where))
+        existing = GenericDataType.USED_PATH_REGISTRY.get(self._resolved_path)
+        if existing is not None:
+            raise ValueError(f"Target at path {where} already open as {existing!r}.")
+        GenericDataType.USED_PATH_REGISTRY[self._resolved_path] = self
 
         self.path:Path = where
         """ A filesystme path where this target resides. """
 
-        self.depends:Dict[str,"GenericDataType"] = depends
+        self.depends:Dict[str,"GenericDataType"] = {} if depends is None else depends
         """ A dict of named references enumerating all other data units required for computation. """
 
         self.params:Any = params
@@ -302,10 +525,8 @@ class GenericDataType(ABC):
         self.touched:bool = False
         """ Overrides determinig up-to-dateness; if `True`, forces this target to be considered out-of-date. """
 
-        self.depth:int = 0
+        self.depth:int = max((d.depth for d in self.depends.values()), default=-1) + 1
         """ How many levels of prerequisities does this target have. Used for generating Bash script with GNU Parallel. """
-        for d in depends.values():
-            self.depth:int = max(self.depth, d.depth + 1)
 
         self.maker:Callable = maker
         """
@@ -322,6 +543,12 @@ class GenericDataType(ABC):
         2. When some runtime value is provided with `self.set()`. This typically happens during making of this target or during runtime operating, surrogating original file-based data.
         """
 
+        self._utd_cache:Union[None,bool] = None
+        self._mtime_cache:Union[None,float] = None
+        self._digest_cache:Union[None,Tuple[Union[None,str]]] = None
+        self._cache_generation:int = -1
+        self._repr_body:Union[None,str] = None
+
     def load(self) -> None:
         """ This has to recover value stored in `self.path` to `self.value`. """
         raise NotImplementedError
@@ -341,18 +568,72 @@ class GenericDataType(ABC):
         self.value = value
         save = auto_save_override if auto_save_override is not None else GenericDataType.AUTO_SAVING_TO_FILE
         if save:
-            print(f"Auto saving {self} to FILE!", file=sys.stderr)
+            LOGGER.info("%s: Auto saving to file.", self)
             self.save()
+        self._changed() # After saving, so that nothing memoizes the mtime of the old file meanwhile.
 
     @final
     def get(self) -> Any:
         """ Implements lazy loading. """
         if self.value is None:
-            print(f"Loading target {self} from FILE!", file=sys.stderr)
+            LOGGER.debug("%s: Loading from file.", self)
             self.load()
             #assert self.value is not None, "The value was apparently not loaded in fact."
         return self.value
 
+    @staticmethod
+    def _fresh_query(query:Callable[[],Any]) -> Any:
+        """ Evaluates a query from outside of `make` on a fresh generation. The answers stay readable by `__repr__` until the next generation. """
+        GenericDataType.invalidate_caches()
+        GenericDataType._QUERYING = True
+        try:
+            return query()
+        finally:
+            GenericDataType._QUERYING = False
+
+    @staticmethod
+    def invalidate_caches() -> None:
+        """ Discards all memoized up-to-dateness and modification times. Call this when files were changed behind the pipeline's back. """
+        GenericDataType._GENERATION += 1
+
+    def _changed(self) -> None:
+        """ Drops memoized values which may depend on this target. Within `make`, only this target and its dependents are affected. """
+        dependents = GenericDataType._DEPENDENTS
+        if dependents is None:
+            GenericDataType.invalidate_caches()
+            return
+        stack, seen = [self], {self}
+        while stack:
+            t = stack.pop()
+            t._utd_cache = None
+            t._mtime_cache = None
+            t._digest_cache = None
+            for d in dependents.get(t, ()):
+                if d not in seen:
+                    seen.add(d)
+                    stack.append(d)
+
+    def _collect_dependents(self) -> Dict["GenericDataType",List["GenericDataType"]]:
+        """ Reverses the dependency edges of the DAG rooted at this target. """
+        dependents:Dict[GenericDataType,List[GenericDataType]] = {}
+        stack, seen = [self], {self}
+        while stack:
+            t = stack.pop()
+            for dep in t.depends.values():
+                dependents.setdefault(dep, []).append(t)
+                if dep not in seen:
+                    seen.add(dep)
+                    stack.append(dep)
+        return dependents
+
+    def _sync_caches(self) -> None:
+        """ Drops this target's memoized values if they come from an older generation. """
+        if self._cache_generation != GenericDataType._GENERATION:
+            self._cache_generation = GenericDataType._GENERATION
+            self._utd_cache = None
+            self._mtime_cache = None
+            self._digest_cache = None
+
     @final
     def make(self, recurse=True, force=False) -> None:
         """ A generic tool which backtracks all source targets and makes them if not ready.
@@ -360,33 +641,79 @@ class GenericDataType(ABC):
         `recurse`: Check up-to-dateness recursively. If False, this target takes its prequisities even tough they may not be up-to-date.
         `force` : All dependencies are made regardless of their up-to-dateness.
         """
+        # The filesystem might have changed since the last make.
+        GenericDataType.invalidate_caches()
+        outer = GenericDataType._DEPENDENTS # A maker may make other targets on its own.
+        dependents = GenericDataType._DEPENDENTS = self._collect_dependents()
+        try:
+            if recurse and GenericDataType.MAKE_JOBS != 1:
+                self._make_dag(dependents, force)
+            else:
+                self._make(recurse, force, set())
+        finally:
+            GenericDataType._DEPENDENTS = outer
+            GenericDataType.invalidate_caches() # Targets outside of this DAG might depend on what was made.
+
+    def _make_dag(self, dependents:Dict["GenericDataType",List["GenericDataType"]], force:bool) -> None:
+        """ Makes the whole DAG by Kahn's algorithm. Every target is submitted to a thread pool as soon as all its prequisities are done, so independent branches proceed concurrently. """
+        from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+        pending:Dict[GenericDataType,int] = {t: len(t.depends) for t in (self, *dependents)}
+        jobs = GenericDataType.MAKE_JOBS or min(GenericDataType._parse_jobs(t.parallelizable) for t in pending)
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            running = {pool.submit(t._make, False, force): t for t, n in pending.items() if n == 0}
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    made = running.pop(future)
+                    future.result() # Re-raises the maker's exception; nothing new gets submitted then.
+                    for d in dependents.get(made, ()):
+                        pending[d] -= 1 # Once per edge, just as `len(d.depends)` counts them.
+                        if pending[d] == 0:
+                            running[pool.submit(d._make, False, force)] = d
+
+    @staticmethod
+    def _parse_jobs(parallelizable:str) -> int:
+        """ Interprets a `GNU Parallel`-like job count, i.e., either a number or a percentage of CPUs. """
+        if parallelizable.endswith("%"):
+            return max(1, (os.cpu_count() or 1) * int(parallelizable[:-1]) // 100)
+        return max(1, int(parallelizable))
+
+    def _make(self, recurse:bool, force:bool, visited:Union[None,Set["GenericDataType"]]=None) -> None:
+        """ The recursive part of `make`, reusing memoized values in between makers. Targets in `visited` were handled earlier in this `make` (shared prequisities of a diamond), so they are skipped. """
+        if visited is not None:
+            if self in visited:
+                return
+            visited.add(self)
 
         # Measure time.
-        print(f"{self}: Start making with {len(self.depends)} dependencies.", file=sys.stderr)
-        time_start = time.time()
+        LOGGER.info("%s: Start making with %d dependencies.", self, len(self.depends))
+        time_start = time.monotonic()
 
         # Make the prequisities. The recursivity must not be wanted, e.g., when manually experimenting / debugging a signlge pipeline stage.
         if recurse:
             for _, dep in self.depends.items():
-                dep.make(recurse, force)
+                dep._make(recurse, force, visited)
 
         # The criterion of whether to launch the associeated maker function.
         if force or not self.is_up_to_date():
-            print(f"{self}: Launch maker {self.maker}", file=sys.stderr)
-            time_make_start = time.time()
+            LOGGER.info("%s: Launch maker %s", self, self.maker)
+            time_make_start = time.monotonic()
             self.maker(self)
-            time_make_duration = time.time() - time_make_start
-            time_make_sec = time_make_duration // 60
-            time_make_min = int(time_make_duration / 60)
-            print(f"{self}: Maker function done in {time_make_min}min {time_make_sec:.2}s.", file=sys.stderr)
+            self._changed()
+            if GenericDataType.CONTENT_HASHES:
+                self._record_digests()
+            elif os.path.lexists(self._hash_path()):
+                os.remove(self._hash_path()) # Would be stale otherwise.
+            time_make_duration = time.monotonic() - time_make_start
+            time_make_min, time_make_sec = divmod(time_make_duration, 60.0)
+            LOGGER.info("%s: Maker function done in %dmin %.2fs.", self, time_make_min, time_make_sec)
         else:
-            print(f"{self}: Already made.", file=sys.stderr)
+            LOGGER.info("%s: Already made.", self)
 
         # Timing.
-        duration = time.time() - time_start
-        time_sec = duration // 60
-        time_min = int(duration / 60)
-        print(f"{self}: Made in {time_min}min {time_sec:.2}s.", file=sys.stderr)
+        duration = time.monotonic() - time_start
+        time_min, time_sec = divmod(duration, 60.0)
+        LOGGER.info("%s: Made in %dmin %.2fs.", self, time_min, time_sec)
 
     def str_detailed(self) -> str:
         """ Some sort of detailed description. """
@@ -397,36 +724,158 @@ class GenericDataType(ABC):
         """ ... """
         #print(f"Marking {self} as touched!")
         self.touched = True
+        self._changed()
 
     @final
     def __repr__(self) -> str:
-        color = fg("green") if self.is_up_to_date() else fg("red")
-        reset = attr("reset")
-        return f"{color}{str(self.path)}{reset}{attr('dim')} [{self.depth}@{self.parallelizable}jobs] ({type(self).__name__}){reset}"# + ("\n" + x if len(x.strip()) > 0 else "")
+        # Only reuse a known up-to-dateness; evaluating it here would walk the whole DAG on every log line.
+        utd = self._utd_cache if self._cache_generation == GenericDataType._GENERATION else None
+        reset, dim, utd_color = _repr_style()
+        if self._repr_body is None: # Everything but the color is fixed, so it is rendered once.
+            self._repr_body = f"{str(self.path)}{reset}{dim} [{self.depth}@{self.parallelizable}jobs] ({type(self).__name__}){reset}"# + ("\n" + x if len(x.strip()) > 0 else "")
+        return utd_color[utd] + self._repr_body
 
     @final
     def mtime(self) -> float:
         """ Returns the modification time. For directories, the oldest modification time among all descendatns is returned. """
-        # If the file is not ready yet...
-        if not self.path.exists():
-            return float("-inf")
+        if GenericDataType._DEPENDENTS is None and not GenericDataType._QUERYING:
+            return GenericDataType._fresh_query(self.mtime)
+        self._sync_caches()
+        if self._mtime_cache is None:
+            self._mtime_cache = self._scan_mtime()
+        return self._mtime_cache
+
+    def _mtime_below(self, threshold:float) -> bool:
+        """ Whether `self.mtime() < threshold`. Without a memoized mtime, the directory walk stops at the first entry older than `threshold`. """
+        self._sync_caches()
+        if self._mtime_cache is None:
+            scanned = self._scan_mtime(threshold)
+            if scanned >= threshold: # The scan went through, so it is the exact value.
+                self._mtime_cache = scanned
+            return scanned < threshold
+        return self._mtime_cache < threshold
+
+    def _scan_mtime(self, stop_below:float=float("-inf")) -> float:
+        """ Walks `self.path` without building `Path` objects and returns the oldest modification time. Returns early once it gets below `stop_below`. """
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return float("-inf") # The file is not ready yet...
+        ret = st.st_mtime
+        if stat.S_ISDIR(st.st_mode) and GenericDataType.MTIME_STAT_JOBS > 1:
+            ret = min(GenericDataType._batched_min_mtime(str(self.path)), ret)
+        elif stat.S_ISDIR(st.st_mode):
+            stack = [str(self.path)]
+            while stack:
+                with os.scandir(stack.pop()) as it:
+                    for entry in it:
+                        ret = min(entry.stat().st_mtime, ret)
+                        if ret < stop_below:
+                            return ret
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+        return ret
+
+    @staticmethod
+    def _batched_min_mtime(root:str) -> float:
+        """ Lists the tree first (directory entries carry their type, so no stat is needed), then stats it in batches by a thread pool. """
+        paths:List[str] = []
+        stack = [root]
+        while stack:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    paths.append(entry.path)
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+        from concurrent.futures import ThreadPoolExecutor
+        n = GenericDataType.MTIME_STAT_BATCH
+        batches = [paths[i:i+n] for i in range(0, len(paths), n)]
+        with ThreadPoolExecutor(max_workers=GenericDataType.MTIME_STAT_JOBS) as pool:
+            return min(pool.map(lambda batch: min(os.stat(p).st_mtime for p in batch), batches), default=float("inf"))
+
+    @final
+    def content_digest(self) -> Union[None,str]:
+        """ BLAKE2b digest of the file, or of the relative paths and contents of all files below a directory. `None` if missing. Memoized like `mtime`. """
+        if GenericDataType._DEPENDENTS is None and not GenericDataType._QUERYING:
+            return GenericDataType._fresh_query(self.content_digest)
+        self._sync_caches()
+        if self._digest_cache is None:
+            self._digest_cache = (self._scan_digest(),)
+        return self._digest_cache[0]
+
+    def _scan_digest(self) -> Union[None,str]:
+        h = hashlib.blake2b(digest_size=16)
+        root = str(self.path)
+        try:
+            st = os.stat(root)
+        except FileNotFoundError:
+            return None
+        if stat.S_ISDIR(st.st_mode):
+            files = []
+            stack = [root]
+            while stack:
+                with os.scandir(stack.pop()) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        else:
+                            files.append(entry.path)
         else:
-            ret = os.path.getmtime(self.path.resolve())
-            if self.path.is_dir():
-                for g in self.path.rglob("*"):
-                    ret = min(os.path.getmtime(g.resolve()), ret)
-            return ret
+            files = [root]
+        for f in sorted(files):
+            h.update(os.path.relpath(f, root).encode() + b"\0")
+            with open(f, "rb") as fd:
+                h.update(hashlib.file_digest(fd, "blake2b").digest())
+        return h.hexdigest()
+
+    def _hash_path(self) -> str:
+        return str(self.path) + GenericDataType.HASH_SUFFIX
+
+    def _hashed_preqs(self) -> Iterator[Tuple[str,"GenericDataType"]]:
+        """ Prequisities subject to content hashing. Directories containing this target, e.g., the module directory, are left out: they hold this target and its sidecar, so they would never hash equal, and they cannot be newer than this target anyway. """
+        for name, preq in self.depends.items():
+            if not self._resolved_path.startswith(preq._resolved_path + os.sep):
+                yield name, preq
+
+    def _newer_preqs_unchanged(self) -> bool:
+        """ Whether the prequisities newer than this target still have the digests recorded when it was last made. Only those are hashed. """
+        try:
+            with open(self._hash_path(), "r") as f:
+                recorded = dict(line.rstrip("\n").split("\t", 1) for line in f)
+        except FileNotFoundError:
+            return False
+        own = self.mtime()
+        return all(recorded.get(name) == preq.content_digest() for name, preq in self._hashed_preqs() if own < preq.mtime())
+
+    def _record_digests(self) -> None:
+        content = "".join(f"{name}\t{preq.content_digest()}\n" for name, preq in self._hashed_preqs())
+        with open(self._hash_path(), "w") as f:
+            f.write(content)
 
     @final
     def is_up_to_date(self) -> bool:
-        """ Up-to-dateness criterion. """
+        """ Up-to-dateness criterion. Memoized only within a `make` or a single call; a standalone call always looks at the filesystem anew. """
+        if GenericDataType._DEPENDENTS is None and not GenericDataType._QUERYING:
+            return GenericDataType._fresh_query(self.is_up_to_date)
+        self._sync_caches()
+        if self._utd_cache is None:
+            self._utd_cache = self._check_up_to_date()
+        return self._utd_cache
+
+    def _check_up_to_date(self) -> bool:
+        """ Evaluates the up-to-dateness criterion; prequisities answer from their memoized values. """
         if self.touched:
             return False
+        if not self.depends:
+            return os.path.exists(self.path) # A leaf, e.g., the module's source code. No need to walk a directory for its mtime.
+        if not os.path.exists(self.path):
+            return False # Not made at all, no need to look at the prequisities.
+        assert all(isinstance(preq, GenericDataType) for preq in self.depends.values())
+        if self._mtime_below(max(preq.mtime() for preq in self.depends.values())):
+            if not (GenericDataType.CONTENT_HASHES and self._newer_preqs_unchanged()):
+                return False # If any of prequisite is newer than this target, I am out of date. Checked first, as it costs stats instead of a recursion.
         for preq in self.depends.values():
-            assert isinstance(preq, GenericDataType)
             if not preq.is_up_to_date():
                 return False # If any of prequisities is out-of-date, I am as well.
-            if self.mtime() < preq.mtime():
-                return False # If any of prequisite is newer than this target, I am out of date.
-        return self.path.exists() # If all prequisities are OK, I might not be.
+        return True
 
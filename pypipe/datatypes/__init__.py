@@ -4,49 +4,89 @@
 # Author:    Ing. Martin Zoula (zoulamar@fel.cvut.cz)
 
 from pypipe import GenericDataType
-from yaml import safe_load, safe_dump
+from yaml import load, safe_dump
+try:
+    from yaml import CSafeLoader as SafeLoader # libyaml bindings, if PyYAML was built with them.
+except ImportError:
+    from yaml import SafeLoader
 from pprint import pformat
 import numpy as np
+import zipfile
+from typing import Iterator
 
 class YamlDataType(GenericDataType):
     """ TODO: Add a method which would check some intended structure and types in the file. """
+    __slots__ = ()
+
     def load(self):
-        self.value = safe_load(open(str(self.path), "r").read())
+        with open(str(self.path), "rb") as f:
+            self.value = load(f, Loader=SafeLoader)
 
     def save(self):
         with open(str(self.path), "w") as f:
             safe_dump(self.value, f)
 
     def str_detailed(self)->str:
-        loaded = self.load()
-        return pformat(loaded)
+        return pformat(self.get())
 
 class NpzDataType(GenericDataType):
     """ Numpy-centric storage of several named arrays in a zip archive. """
+    __slots__ = ()
+
+    COMPRESSED:bool = False
+    """ Whether `save` deflates the archive members. Off by default, as zlib is single-threaded and usually dominates the time spent writing intermediate results; `load` reads either kind. """
+
     def load(self):
-        self.value = dict(np.load(self.path, allow_pickle=True))
+        with np.load(self.path, allow_pickle=True) as npz:
+            self.value = dict(npz)
         #print(f"Loaded value {self.value} from {self.path}")
 
     def save(self):
         assert self.value is not None
         #print(f"Saving value {self.value} to {self.path}")
-        np.savez_compressed(self.path, **self.value)
+        (np.savez_compressed if NpzDataType.COMPRESSED else np.savez)(self.path, **self.value)
 
     def str_detailed(self):
         try:
-            loaded = self.get()
-            assert isinstance(loaded, dict)
-            out = []
-            for label, data in loaded.items():
-                out.append(f"Array '{label}' of shape {data.shape}.")
-            return "\n".join(out)
+            return "\n".join(f"Array '{label}' of shape {shape}." for label, shape in self.iter_shapes())
         except FileNotFoundError:
             return f"File not ready yet."
 
+    def load_members(self, keys:list[str]|set[str]) -> dict[str,np.ndarray]:
+        """ Reads only the named arrays, leaving the other archive members untouched. Served from `self.value` when already loaded. """
+        if self.value is not None:
+            return {k: v for k, v in self.value.items() if k in keys}
+        with np.load(self.path, allow_pickle=True) as npz:
+            return {k: npz[k] for k in npz.files if k in keys}
+
+    def iter_arrays(self) -> Iterator[tuple[str,np.ndarray]]:
+        """ Yields the named arrays one by one. Unless already loaded, only one of them is held in memory at a time. """
+        if self.value is not None:
+            yield from self.value.items()
+            return
+        with np.load(self.path, allow_pickle=True) as npz:
+            for k in npz.files:
+                yield k, npz[k]
+
+    def iter_shapes(self) -> Iterator[tuple[str,tuple[int,...]]]:
+        """ Yields the shapes of the named arrays. Unless already loaded, they come from the `.npy` headers of the archive members, so no array data is read. """
+        if self.value is not None:
+            yield from ((k, v.shape) for k, v in self.value.items())
+            return
+        with zipfile.ZipFile(self.path) as archive:
+            for info in archive.infolist():
+                with archive.open(info) as f:
+                    version = np.lib.format.read_magic(f)
+                    if version == (1, 0):
+                        shape = np.lib.format.read_array_header_1_0(f)[0]
+                    elif version == (2, 0):
+                        shape = np.lib.format.read_array_header_2_0(f)[0]
+                    else: # No public header reader for newer formats.
+                        f.seek(0)
+                        shape = np.lib.format.read_array(f, allow_pickle=True).shape
+                yield info.filename.removesuffix(".npy"), shape
+
     def to_array(self, keys:None|list[str]|set[str] = None):
-        data:dict[str,np.ndarray] = self.get()
-        if keys is None:
-            return np.array(list(data.values())).T
-        else:
-            return np.array([v for k, v in data if k in keys]).T
+        data:dict[str,np.ndarray] = self.get() if keys is None else self.load_members(keys)
+        return np.column_stack(list(data.values()))
 
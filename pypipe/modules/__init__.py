@@ -2,3 +2,4 @@
 
 from .basic import *
 from .numpy import *
+from .visualization import *
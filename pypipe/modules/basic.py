@@ -5,21 +5,19 @@
 
 from pypipe import BaseModule, GenericDataType
 from pathlib import Path
-from pypipe.datatypes import NpzDataType, YamlDataType
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_pdf import PdfPages
-from pypipe.sciplotrc import IEEE_COL_WIDTH
+from pypipe.datatypes import YamlDataType
+import glob as globlib
 import os
 import shutil
-import numpy as np
 
 class RootModule (BaseModule):
     """ Just a generic class which blocks further recursive submodule search. """
-    def __init__(self, module_path:Path) -> None:
-        super().__init__(module_path, is_root_module=True)
+    __slots__ = ()
+    is_root_module = True
 
 class LocalData (RootModule):
     """ Static data root module. Declares all regexp-selected files as always-ready targets. """
+    __slots__ = ()
 
     def __init__(self, module_path: Path) -> None:
         super().__init__(module_path)
@@ -34,6 +32,8 @@ class LocalData (RootModule):
         return ret
 
 class RemoteData (RootModule):
+    __slots__ = ()
+
     def __init__(self, module_path: Path) -> None:
         super().__init__(module_path)
 
@@ -60,28 +60,26 @@ class RemoteData (RootModule):
         assert isinstance(globs, list)
         missing_is_ok = config["mounted"]
         paths = []
-        for glob in globs:
-            if glob.startswith("/"):
-                glob = glob[1:]
-            result = list(Path("/").glob(glob))
+        for glob in dict.fromkeys(g.lstrip("/") for g in globs): # Walk each distinct pattern once.
+            result = globlib.glob(glob, root_dir="/", recursive=True, include_hidden=True) # Same matching as Path.glob, minus the per-entry Path objects.
             if len(result) == 0 and not missing_is_ok:
                 raise FileNotFoundError(glob)
-            for match in result:
+            for match in map(Path("/").joinpath, result):
                 if match.exists():
                     paths.append(match)
                 elif not missing_is_ok:
                     raise FileNotFoundError(glob)
 
+        # Copies are I/O bound, typically from a mounted remote, so they run in threads. The times are set by the touch below, hence no `copy2`.
+        from concurrent.futures import ThreadPoolExecutor
         target_dir = target.path.parent
-        result_paths = []
-        touch_paths = []
-        for src_path in paths:
-            assert isinstance(src_path, Path)
-            dst_path = target_dir / src_path.name
-            touch_paths.append(dst_path)
-            result_paths.append(str(shutil.copy2(src_path, dst_path)))
+        # Each destination is written once; as with copying one by one, the last match of a basename wins. This also drops files hit by several patterns.
+        sources = {target_dir / src_path.name: src_path for src_path in paths}
+        dst_paths = list(sources)
+        with ThreadPoolExecutor() as pool:
+            result_paths = list(map(str, pool.map(shutil.copy, sources.values(), dst_paths)))
         target.set(result_paths)
 
-        for dst_path in touch_paths:
-            dst_path.touch()
+        for dst_path in dst_paths:
+            os.utime(dst_path)
 
@@ -7,10 +7,11 @@ from pypipe import BaseModule, GenericDataType
 from pathlib import Path
 from pypipe.datatypes import NpzDataType, YamlDataType
 import numpy as np
-from collections import defaultdict
+from typing import TextIO
 
 class ConvertToNpz (BaseModule):
     """ Converts supported file formats into Numpy binary data. """
+    __slots__ = ()
 
     def __init__(self, module_path: Path) -> None:
         super().__init__(module_path)
@@ -19,7 +20,7 @@ class ConvertToNpz (BaseModule):
         config = YamlDataType(self.module_path / "config.yaml", GenericDataType.expect_made)
         ret = {}
         for t_name, t_obj in self.get_parent().targets.items():
-            ret[t_name] = NpzDataType(Path(self.module_path / (t_obj.path.stem + ".npz")), self.maker, {"config": config, "src": t_obj})
+            ret[t_name] = NpzDataType(self.module_path / f"{t_obj.path.stem}.npz", self.maker, {"config": config, "src": t_obj})
         return ret
 
     @staticmethod
@@ -38,10 +39,12 @@ class ConvertToNpz (BaseModule):
     @staticmethod
     def maker_csv(target:NpzDataType, source:GenericDataType, config:dict):
         delim = "," if ("delimiter" not in config) else config["delimiter"]
-        with open(source.path, "r") as f:
-            labels = list(map(lambda x : x.strip(), f.readline().split(sep=delim)[1:]))
         comments = None if "comments" not in config else config["comments"]
-        data = np.loadtxt(source.path, delimiter=delim, comments=comments)
+        with open(source.path, "r") as f: # One pass: the parsers continue right after the header line.
+            labels = [x.strip() for x in f.readline().split(sep=delim)[1:]]
+            data = ConvertToNpz.read_csv_pandas(f, delim, comments)
+            if data is None:
+                data = np.loadtxt(f, delimiter=delim, comments=comments)
         print(data, data.shape, len(labels))
         assert data.shape[1] == len(labels)
         ret = {}
@@ -49,11 +52,23 @@ class ConvertToNpz (BaseModule):
             ret[label] = data[:,i]
         target.set(ret)
 
+    @staticmethod
+    def read_csv_pandas(f:TextIO, delim:str, comments) -> np.ndarray|None:
+        """ Parses the CSV body with the C parser of pandas, if installed. Returns None when pandas is missing or cannot express `comments` (it takes a single character only), letting the caller fall back to `np.loadtxt`. """
+        if not (comments is None or (isinstance(comments, str) and len(comments) == 1)):
+            return None
+        try:
+            import pandas
+        except ImportError:
+            return None
+        return pandas.read_csv(f, sep=delim, header=None, comment=comments, dtype=float).to_numpy()
+
 class NpzDataset (BaseModule):
     """ Annotates each NPZ source dataset in parent with training, validation and testing data. Effectively reorganizes the numpy array, splitting "*" array into "*:tst", "*:val" and "*:trn"
 
     TODO? Enable some augmentations like gaussian noise addition or whatnot...
     """
+    __slots__ = ()
 
     def __init__(self, module_path: Path) -> None:
         super().__init__(module_path)
@@ -62,27 +77,21 @@ class NpzDataset (BaseModule):
         config = YamlDataType(self.module_path / "config.yaml", GenericDataType.expect_made)
         config_data = config.get()
         xvalin = NpzDataset.cfg_xval(config_data)
-        if "random-seed" in config_data:
-            np.random.seed(config_data["random-seed"])
         ret = {}
+        if xvalin in (None, False,  0):
+            folds = {"": None}
+        else:
+            assert isinstance(xvalin, int)
+            pad = len(str(xvalin)) # Digits of xvalin, as before.
+            folds = {f":xval{i:0{pad}d}": i for i in range(xvalin)} # Same for every source.
         for t_name, t_obj in self.get_parent().targets_by_type(NpzDataType):
-            if xvalin in (None, False,  0):
-                ret[t_name] = NpzDataType(Path(self.module_path / (t_name + ".npz")), self.maker, {"config": config, "src": t_obj})
-            else:
-                assert isinstance(xvalin, int)
-                pad=int(np.log10(xvalin))+1
-                for i in range(xvalin):
-                    t_name_i = f"{t_name}:xval{i:0{pad}d}"
-                    ret[t_name_i] = NpzDataType(Path(self.module_path / (t_name_i + ".npz")), self.maker, {"config": config, "src": t_obj})
+            for suffix, fold in folds.items():
+                ret[t_name + suffix] = NpzDataType(self.module_path / f"{t_name}{suffix}.npz", self.maker, {"config": config, "src": t_obj}, params=fold)
         return ret
 
     @staticmethod
     def cfg_xval(cfg):
-        if "cross-validation-instances" in cfg:
-            xvalin = cfg["cross-validation-instances"]
-        else:
-            xvalin = None
-        return xvalin
+        return cfg.get("cross-validation-instances")
 
     @staticmethod
     def maker(target:NpzDataType):
@@ -93,10 +102,10 @@ class NpzDataset (BaseModule):
         src_target:NpzDataType = target.depends["src"] # type:ignore
         config = config_target.get()
         data:dict[str,np.ndarray] = src_target.get()
-        try:
-            rows,_ = src_target.to_array().shape # NOTE: If input data is of non-homogeneous size, this will fail.
-        except:
+        lengths = {len(v) for v in data.values()} # Just the row counts; no need to stack the data.
+        if len(lengths) != 1:
             raise ValueError("Source data is not homogeneous.")
+        rows, = lengths
 
         # Prepare return
         ret = dict()
@@ -107,19 +116,17 @@ class NpzDataset (BaseModule):
             # Compute how many samples per cross-validation class.
             ratios = np.array([float(config[x]) for x in ("trn", "val", "tst")])
             assert np.sum(ratios) <= 1, f"Training, validation and testing proportions sum to over 1. ({ratios})"
-            n = np.floor(ratios * rows)
+            n = np.floor(ratios * rows).astype(np.int64)
 
-            # Assign labels to each dataset row.
-            labels = np.ones((rows,1)) * -1 # Default class -1 = unassigned.
-            labels[:int(n[0])] = 0
-            labels[int(n[0]):int(n[0]+n[1])] = 1
-            labels[int(n[0]+n[1]):int(n[0]+n[1]+n[2])] = 2 # NOTE: Here a sample may be omitted due to rounding.if config["shuffle"]:
+            # Assign labels to each dataset row. Class -1 = unassigned. NOTE: Here a sample may be omitted due to rounding.
+            labels = np.repeat(np.array([0, 1, 2, -1], dtype=np.int8), [n[0], n[1], n[2], rows - n.sum()])
             if "shuffle" in config and config["shuffle"] is True:
-                np.random.shuffle(labels)
-            hist = defaultdict(int)
-            for i in labels.squeeze():
-                hist[i] += 1
-            print(hist)
+                # A generator of its own per fold, so that the result neither depends on the order of making nor races with parallel makers.
+                seed = config.get("random-seed")
+                rng = np.random.default_rng(None if seed is None else [seed, target.params or 0])
+                rng.shuffle(labels)
+            classes, counts = np.unique(labels, return_counts=True)
+            print(dict(zip(classes.tolist(), counts.tolist())))
 
             # Add.
             ret["xval_labels"] = labels
@@ -132,7 +139,7 @@ class NpzDataset (BaseModule):
                     raise NotImplementedError("Tbd.")
                 else:
                     vec.append(data[descr])
-            ret[XY] = np.array(vec).T
+            ret[XY] = np.column_stack(vec) # C-contiguous rows, unlike a transposed stack.
 
         # Copy misceleneaous fields
         if "misc_fields" in config:
@@ -1,5 +1,23 @@
+#!/usr/bin/echo Script not meant as executable:
+
+# Filename:  visualization.py
+# Author:    Ing. Martin Zoula (zoulamar@fel.cvut.cz)
+
+from pypipe import BaseModule, GenericDataType
+from pathlib import Path
+from pypipe.datatypes import NpzDataType, YamlDataType
+import numpy as np
+import os
+# NOTE: matplotlib is imported by the makers only, so that resolving std modules stays cheap.
+
 
 class Plot (BaseModule):
+    """ Plots each array of each NPZ target in parent into a page of a PDF. Optional config keys: `max-points` limits the points drawn per array (all by default), `rasterize` gives a DPI at which the lines are rasterized (`true` takes the `savefig.dpi` rc setting). """
+    __slots__ = ()
+
+    MAX_POINTS:int = 0
+    """ Default of `max-points`, `0` drawing all points. Set a limit for long series, as every point becomes a PDF path segment. """
+
     def __init__(self, module_path: Path) -> None:
         super().__init__(module_path)
         assert self.parent_module is not None
@@ -14,36 +32,73 @@ class Plot (BaseModule):
 
         return ret
 
+    @staticmethod
+    def decimation(data:np.ndarray, max_points:int) -> np.ndarray|None:
+        """ Indices keeping the minimum and maximum of each of `max_points/2` buckets, so peaks survive unlike with a plain stride. `None` if `data` is short enough, disabled by `max_points`, or not 1-D. """
+        n = data.shape[0]
+        if not max_points or data.ndim != 1 or n <= max_points:
+            return None
+        width = -(-n // max(1, max_points // 2))
+        m = n - n % width
+        buckets = data[:m].reshape(-1, width)
+        starts = np.arange(0, m, width)
+        idx = [starts + buckets.argmin(axis=1), starts + buckets.argmax(axis=1)]
+        if m < n:
+            idx.append(np.array([m + data[m:].argmin(), m + data[m:].argmax()]))
+        return np.unique(np.concatenate(idx)) # Sorted, with a bucket's min and max merged if equal.
+
+    @staticmethod
+    def rasterization_dpi(value) -> float|None:
+        """ Interprets the `rasterize` config value. `None` keeps the lines vector. """
+        if value is None or value is False:
+            return None
+        if value is True: # Not to be taken for 1 DPI.
+            import matplotlib
+            value = matplotlib.rcParams["savefig.dpi"]
+            if value == "figure":
+                value = matplotlib.rcParams["figure.dpi"]
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+            raise ValueError(f"Plot config 'rasterize' must be a boolean or a positive DPI, got {value!r}.")
+        return float(value)
+
     @staticmethod
     def npz(target:GenericDataType):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_pdf import PdfPages
+        from pypipe.sciplotrc import IEEE_COL_WIDTH
+
         cfg = target.depends["cfg"].get()
-        src = target.depends["src"].get()
-
-        if "t" in src:
-            t = src["t"]
-            t = t - t[0]
-            del src["t"]
-        elif "time" in src:
-            t = src["time"]
-            t = t - t[0]
-            del src["time"]
-        else:
-            t = None
+        src:NpzDataType = target.depends["src"] # type:ignore
+
+        # The arrays are streamed from the archive; the time axis is read upfront.
+        times = src.load_members({"t", "time"})
+        t_name = "t" if "t" in times else "time" if "time" in times else None
+        t = None if t_name is None else times[t_name] - times[t_name][0]
+
+        max_points = cfg.get("max-points", Plot.MAX_POINTS) if cfg else Plot.MAX_POINTS
+        dpi = Plot.rasterization_dpi(cfg.get("rasterize") if cfg else None) # Lines are rendered as images of this resolution, labels stay vector.
 
+        # One figure serves all the pages; it is only cleared in between. Not a pyplot one, as pyplot's global state is not thread-safe and makers may run in threads.
+        fig = Figure(figsize=(IEEE_COL_WIDTH, IEEE_COL_WIDTH*.8))
+        ax = fig.subplots()
         try:
             with PdfPages(target.path) as pdf:
-                for data_name, data in src.items():
-                    fig = plt.figure(figsize=(IEEE_COL_WIDTH, IEEE_COL_WIDTH*.8))
+                for data_name, data in src.iter_arrays():
+                    if data_name == t_name:
+                        continue
+                    ax.clear()
+                    idx = Plot.decimation(data, max_points)
                     if t is None:
-                        plt.plot(data)
-                        plt.xlabel("Sample [-]")
+                        xy = (data,) if idx is None else (idx, data[idx])
+                        ax.set_xlabel("Sample [-]")
                     else:
-                        plt.plot(t, data)
-                        plt.xlabel("Time [s]")
-                    plt.ylabel(data_name)
-                    pdf.savefig()
-                    plt.close()
+                        xy = (t, data) if idx is None else (t[idx], data[idx])
+                        ax.set_xlabel("Time [s]")
+                    ax.plot(*xy, rasterized=bool(dpi))
+                    ax.set_ylabel(data_name)
+                    pdf.savefig(fig, dpi=dpi or "figure")
         except:
-            os.remove(target.path)
+            if os.path.exists(target.path): # PdfPages creates the file lazily; do not mask the original error.
+                os.remove(target.path)
             raise
 
@@ -22,6 +22,7 @@ Features:
 
 from typing import List, Tuple, Union
 import matplotlib.pyplot as plt
+from matplotlib.colors import hsv_to_rgb
 import numpy as np
 import colorsys
 
@@ -72,17 +73,11 @@ def hcv_colors(ncolors = 10, base_color = '#005eb8'):
             raise ValueError("Base color not undestood.")
     else:
         raise ValueError("Base color not undestood.")
-    h_step = 1/ncolors
-    rgbs = []
-    for i in range(ncolors):
-        h_this = h + i*h_step
-        s_this = s
-        v_this = v
-        if h_this > 1:
-            h_this -= 1
-        rgbs.append(colorsys.hsv_to_rgb(h_this, s_this, v_this))
-    #print(np.array(rgbs) * 2**8)
-    return rgbs
+    hsv = np.empty((ncolors, 3))
+    hsv[:,0] = (h + np.arange(ncolors) / ncolors) % 1
+    hsv[:,1] = s
+    hsv[:,2] = v
+    return list(map(tuple, hsv_to_rgb(hsv).tolist()))
 
 font = {
     "font.family": "serif",